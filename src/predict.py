@@ -5,29 +5,143 @@ repository, with some modifications to make it work with the RP platform.
 """
 
 import gc
+import os
 import threading
-from concurrent.futures import (
-    ThreadPoolExecutor,
-)  # Still needed for transcribe potentially?
+from functools import lru_cache, partial
+from operator import attrgetter, methodcaller
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
 from runpod.serverless.utils import rp_cuda
 
-from faster_whisper import WhisperModel
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import decode_audio
 from faster_whisper.utils import format_timestamp
+from faster_whisper.transcribe import restore_speech_timestamps
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
 
-# Import torch for CUDA memory management
-try:
-    import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
+# rp_cuda.is_available() shells out to nvidia-smi, so check it only once
+_CUDA = rp_cuda.is_available()
+DEVICE = "cuda" if _CUDA else "cpu"
 
 # Only large-v2 model is available to avoid memory issues
 AVAILABLE_MODELS = {
     "large-v2",
 }
 
+# int8_float16 roughly halves the VRAM footprint of large-v2 on GPU with
+# negligible accuracy loss. Set COMPUTE_TYPE to override (e.g. "float16").
+DEFAULT_COMPUTE_TYPE = "int8_float16" if _CUDA else "int8"
+COMPUTE_TYPE = os.environ.get("COMPUTE_TYPE", DEFAULT_COMPUTE_TYPE)
+
+# Number of VAD chunks decoded together by the batched pipeline. Off by default:
+# batching only applies to requests with enable_vad=True, and the pipeline
+# ignores several decoding options (see README).
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "0"))
+
+# CPU threads used by CTranslate2 for each in-flight transcription
+CPU_THREADS = 4
+
+# Parallel CTranslate2 workers, each serving one transcription at a time on the
+# same weights. Two workers on GPU let one request's encoder overlap another's
+# decoder; on CPU, run one worker per CPU_THREADS-sized slice of the cores.
+if _CUDA:
+    NUM_WORKERS = 2
+else:
+    NUM_WORKERS = max(1, (os.cpu_count() or 1) // CPU_THREADS)
+
+# Segment fields returned in the API response, fetched in one C-level call
+_SEG_KEYS = (
+    "id",
+    "seek",
+    "start",
+    "end",
+    "text",
+    "tokens",
+    "temperature",
+    "avg_logprob",
+    "compression_ratio",
+    "no_speech_prob",
+)
+_SEG_FIELDS = attrgetter(*_SEG_KEYS)
+_SEG_TEXT = attrgetter("text")
+_LSTRIP = methodcaller("lstrip")
+
+# One WhisperModel is shared by every Predictor in the process, so the weights
+# are resident on the device only once regardless of how many are created.
+_SHARED_MODEL = None
+_SHARED_MODEL_LOCK = threading.Lock()
+
+# Bounds in-flight transcriptions on the shared model to one per CTranslate2
+# worker, so no request sits queued inside CTranslate2.
+_TRANSCRIBE_SEMAPHORE = threading.Semaphore(NUM_WORKERS)
+
+# Shared pool for post-processing that can overlap with model work, created
+# once per process instead of per request.
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="whisper-io")
+
+# Whisper models expect 16kHz audio
+SAMPLING_RATE = 16000
+
+# Fallback schedule for the default temperature=0, increment=0.2
+_DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Parsed form of the default suppress_tokens="-1"
+_SUPPRESS_DEFAULT = [-1]
+
+
+def _load_pcm(path):
+    """
+    Decode an audio file into float32 mono samples at the model's sampling rate.
+    """
+    return decode_audio(path, sampling_rate=SAMPLING_RATE)
+
+
+def _as_float_pcm(audio):
+    """
+    Validate raw mono audio and convert it to float32 samples in [-1, 1].
+    Signed integer PCM is scaled; other non-float dtypes are rejected.
+    """
+    if audio.ndim != 1:
+        raise ValueError(f"Raw audio must be a 1-D mono array, got shape {audio.shape}")
+    if np.issubdtype(audio.dtype, np.signedinteger):
+        return audio.astype(np.float32) / -np.iinfo(audio.dtype).min
+    if not np.issubdtype(audio.dtype, np.floating):
+        raise ValueError(f"Raw audio must be float or signed integer PCM, got {audio.dtype}")
+    return audio.astype(np.float32, copy=False)
+
+
+def _speech_only(audio, vad_parameters):
+    """
+    Run Silero VAD on the audio and return (speech_audio, speech_chunks): the
+    speech regions concatenated into one array, and the chunks needed to map
+    segment timestamps back onto the original audio. This mirrors what
+    transcribe() does internally for vad_filter=True.
+    """
+    vad_options = VadOptions(**vad_parameters) if vad_parameters else VadOptions()
+    speech_chunks = get_speech_timestamps(audio, vad_options)
+    audio_chunks, _ = collect_chunks(audio, speech_chunks)
+    return np.concatenate(audio_chunks, axis=0), speech_chunks
+
+
+@lru_cache(maxsize=32)
+def _build_temperature(start, step):
+    """
+    Build the temperature fallback schedule, cached per (start, step) pair.
+    """
+    if step is None:
+        return (start,)
+    return tuple(np.arange(start, 1.0 + 1e-6, step))
+
+
+def _parse_suppress_tokens(suppress_tokens):
+    """
+    Convert the comma-separated suppress_tokens string into a list of token ids.
+    """
+    if suppress_tokens is None or suppress_tokens == "-1":
+        return _SUPPRESS_DEFAULT
+    return [int(token) for token in suppress_tokens.split(",") if token.strip()]
+
 
 class Predictor:
     """A Predictor class for the Whisper model with lazy loading"""
@@ -35,39 +149,88 @@ class Predictor:
     def __init__(self):
         """Initializes the predictor with no models loaded."""
         self.model = None
-        self.model_lock = (
-            threading.Lock()
-        )  # Lock for thread-safe model access
+        self.batched_model = None
+        # Shared with every other Predictor, since they share one model
+        self.transcribe_semaphore = _TRANSCRIBE_SEMAPHORE
 
     def setup(self):
         """Pre-load large-v2 model to avoid loading delays and memory issues."""
+        global _SHARED_MODEL
+        with _SHARED_MODEL_LOCK:
+            if _SHARED_MODEL is not None:
+                print("Reusing large-v2 model already loaded in this process.")
+                self.model = _SHARED_MODEL
+            else:
+                self._load_model()
+                _SHARED_MODEL = self.model
+
+        if BATCH_SIZE > 0:
+            self.batched_model = BatchedInferencePipeline(model=self.model)
+
+    def _load_model(self):
+        """Load and warm up the large-v2 model."""
         print("Loading large-v2 model during setup...")
-        
-        # Clear CUDA cache before loading model to maximize available memory
-        if rp_cuda.is_available():
-            gc.collect()
-            if TORCH_AVAILABLE:
-                torch.cuda.empty_cache()
-                print("Cleared CUDA cache before model loading")
-        
+
+        # No CUDA cache clearing here: this is the only model the worker ever
+        # loads, and CTranslate2 manages its own workspace. Emptying the cache
+        # would only force later allocations back through cudaMalloc.
         try:
             self.model = WhisperModel(
                 "large-v2",
-                device="cuda" if rp_cuda.is_available() else "cpu",
-                compute_type="float16" if rp_cuda.is_available() else "int8",
+                device=DEVICE,
+                compute_type=COMPUTE_TYPE,
                 # Optimize memory usage
-                cpu_threads=4 if not rp_cuda.is_available() else 0,
+                cpu_threads=CPU_THREADS if not _CUDA else 0,
+                num_workers=NUM_WORKERS,
+            )
+            print(
+                "large-v2 model loaded successfully and cached "
+                f"(compute_type={self.model.model.compute_type})."
             )
-            print("large-v2 model loaded successfully and cached.")
         except Exception as e:
             print(f"Error loading large-v2 model during setup: {e}")
-            # Try to clear memory and provide helpful error message
-            if rp_cuda.is_available():
+            # Reclaim whatever a partially failed load (e.g. OOM) left behind
+            if _CUDA:
                 gc.collect()
-                if TORCH_AVAILABLE:
+                # torch is only needed here; importing it at module load
+                # would slow down cold starts.
+                try:
+                    import torch
                     torch.cuda.empty_cache()
+                except ImportError:
+                    pass
             raise RuntimeError(f"Failed to load large-v2 model during setup: {e}") from e
 
+        self.warmup()
+
+    def warmup(self):
+        """
+        Run a short transcription on silence so the first request does not pay
+        for CTranslate2's workspace allocations. One warmup runs per worker,
+        concurrently, so that every worker gets its allocations done.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=NUM_WORKERS) as pool:
+                for future in [pool.submit(self._warmup_once) for _ in range(NUM_WORKERS)]:
+                    future.result()
+            print("large-v2 model warmed up.")
+        except Exception as e:
+            print(f"Warning: model warmup failed: {e}")
+
+    def _warmup_once(self):
+        """Transcribe one second of silence."""
+        warmup_audio = np.zeros(SAMPLING_RATE, dtype=np.float32)  # 1 second
+        segments, _ = self.model.transcribe(
+            warmup_audio,
+            language="en",
+            beam_size=1,
+            temperature=0,
+            without_timestamps=True,
+        )
+        # transcribe() is lazy; consume it so decoding actually runs.
+        for _ in segments:
+            pass
+
     def predict(
         self,
         audio,
@@ -94,36 +257,53 @@ class Predictor:
     ):
         """
         Run a single prediction on the model, loading/unloading models as needed.
+
+        audio may be a path/URL-like value or a 1-D numpy array of mono 16kHz
+        samples, either float in [-1, 1] or signed integer PCM.
         """
         if model_name not in AVAILABLE_MODELS:
             raise ValueError(
                 f"Invalid model name: {model_name}. Available models are: {AVAILABLE_MODELS}"
             )
 
-        # Use the pre-loaded model (always large-v2)
-        with self.model_lock:
-            if self.model is None:
-                raise RuntimeError("Model not loaded. Ensure setup() was called successfully.")
-            model = self.model
-            print(f"Using cached model: {model_name}")
-
-        # Model is now loaded and ready, proceed with prediction (outside the lock?)
-        # Consider if transcribe is thread-safe or if it should also be within the lock
-        # For now, keeping transcribe outside as it's CPU/GPU bound work
-
-        if temperature_increment_on_fallback is not None:
-            temperature = tuple(
-                np.arange(temperature, 1.0 + 1e-6, temperature_increment_on_fallback)
-            )
+        # Raw 16kHz PCM can be handed to the model as-is, skipping the decode.
+        # Files are decoded once here so the translate pass reuses the samples.
+        if isinstance(audio, np.ndarray):
+            audio_input = _as_float_pcm(audio)
+        else:
+            audio_input = _load_pcm(str(audio))
+        if temperature == 0 and temperature_increment_on_fallback == 0.2:
+            temperature = _DEFAULT_TEMPERATURES
+        else:
+            temperature = _build_temperature(temperature, temperature_increment_on_fallback)
+        suppress_tokens = _parse_suppress_tokens(suppress_tokens)
+
+        # Use the pre-loaded model (always large-v2). The reference never
+        # changes after setup(), so reading it needs no lock; one would only
+        # be needed around a swap if model hot-swapping is ever added.
+        model = self.model
+        if model is None:
+            raise RuntimeError("Model not loaded. Ensure setup() was called successfully.")
+        print(f"Using cached model: {model_name}")
+
+        # With VAD enabled, speech chunks are independent and can be decoded
+        # as a batch, which keeps the GPU busy on long audio.
+        speech_chunks = None
+        transcribe_audio = audio_input
+        if enable_vad and self.batched_model is not None:
+            transcribe = partial(self.batched_model.transcribe, batch_size=BATCH_SIZE)
         else:
-            temperature = [temperature]
-
-        # Note: FasterWhisper's transcribe might release the GIL, potentially allowing
-        # other threads to acquire the model_lock if transcribe is lengthy.
-        # If issues arise, the lock might need to encompass the transcribe call too.
-        segments, info = list(
-            model.transcribe(
-                str(audio),
+            transcribe = model.transcribe
+            if enable_vad:
+                # Run the CPU-bound VAD before taking the semaphore so it does
+                # not hold up other requests, then decode only the speech.
+                transcribe_audio, speech_chunks = _speech_only(audio_input, vad_parameters)
+
+        # transcribe() returns a lazy generator, so the segments are consumed
+        # while the semaphore is still held.
+        with self.transcribe_semaphore:
+            segments_iter, info = transcribe(
+                transcribe_audio,
                 language=language,
                 task="transcribe",
                 beam_size=beam_size,
@@ -138,76 +318,96 @@ class Predictor:
                 initial_prompt=initial_prompt,
                 prefix=None,
                 suppress_blank=True,
-                suppress_tokens=[-1],  # Might need conversion from string
+                suppress_tokens=suppress_tokens,
                 without_timestamps=False,
                 max_initial_timestamp=1.0,
                 word_timestamps=word_timestamps,
-                vad_filter=enable_vad,
+                vad_filter=enable_vad and speech_chunks is None,
                 vad_parameters=vad_parameters,
             )
-        )
-
-        segments = list(segments)
-
-        # Format transcription
-        transcription_output = format_segments(transcription, segments)
+            if speech_chunks is not None:
+                segments_iter = restore_speech_timestamps(
+                    segments_iter, speech_chunks, SAMPLING_RATE
+                )
+            segments = list(segments_iter)
+
+        # When translating, format the transcription on the pool so it
+        # overlaps the translate pass
+        outputs_future = None
+        if translate:
+            outputs_future = _IO_POOL.submit(
+                _build_outputs, segments, transcription, word_timestamps
+            )
 
         # Handle translation if requested
         translation_output = None
         if translate:
-            translation_segments, _ = model.transcribe(
-                str(audio),
-                task="translate",
-                temperature=temperature,  # Reuse temperature settings for translation
-            )
-            translation_output = format_segments(
-                translation, list(translation_segments)
-            )
+            with self.transcribe_semaphore:
+                # Reuse the detected language so the translate pass does not
+                # run the encoder again just for language detection.
+                translation_segments, _ = model.transcribe(
+                    audio_input,
+                    task="translate",
+                    language=info.language,
+                    temperature=temperature,  # Reuse temperature settings for translation
+                )
+                # Only the formatted text is returned for the translation, so
+                # the segments are streamed straight into the formatter.
+                translation_output = format_segments(translation, translation_segments)
+
+        if outputs_future is not None:
+            outputs = outputs_future.result()
+        else:
+            outputs = _build_outputs(segments, transcription, word_timestamps)
+        transcription_output, serialized_segments, word_timestamps_list = outputs
 
         results = {
-            "segments": serialize_segments(segments),
+            "segments": serialized_segments,
             "detected_language": info.language,
             "transcription": transcription_output,
             "translation": translation_output,
-            "device": "cuda" if rp_cuda.is_available() else "cpu",
+            "device": DEVICE,
             "model": model_name,
         }
 
         if word_timestamps:
-            word_timestamps_list = []
-            for segment in segments:
-                for word in segment.words:
-                    word_timestamps_list.append(
-                        {
-                            "word": word.word,
-                            "start": word.start,
-                            "end": word.end,
-                        }
-                    )
             results["word_timestamps"] = word_timestamps_list
 
         return results
 
 
+def _build_outputs(segments, format_type, want_words):
+    """
+    Build the formatted transcription, serialized segments and word timestamps.
+    The serialized segments and word timestamps share a single pass.
+    """
+    serialized_segments = []
+    word_timestamps_list = []
+    append_segment = serialized_segments.append
+    append_word = word_timestamps_list.append
+
+    for segment in segments:
+        append_segment(serialize_segment(segment))
+        if want_words:
+            for word in segment.words:
+                append_word({"word": word.word, "start": word.start, "end": word.end})
+
+    text_output = format_segments(format_type, segments)
+    return text_output, serialized_segments, word_timestamps_list
+
+
+def serialize_segment(segment):
+    """
+    Serialize a single segment to be returned in the API response.
+    """
+    return dict(zip(_SEG_KEYS, _SEG_FIELDS(segment)))
+
+
 def serialize_segments(transcript):
     """
     Serialize the segments to be returned in the API response.
     """
-    return [
-        {
-            "id": segment.id,
-            "seek": segment.seek,
-            "start": segment.start,
-            "end": segment.end,
-            "text": segment.text,
-            "tokens": segment.tokens,
-            "temperature": segment.temperature,
-            "avg_logprob": segment.avg_logprob,
-            "compression_ratio": segment.compression_ratio,
-            "no_speech_prob": segment.no_speech_prob,
-        }
-        for segment in transcript
-    ]
+    return [serialize_segment(segment) for segment in transcript]
 
 
 def format_segments(format_type, segments):
@@ -216,44 +416,48 @@ def format_segments(format_type, segments):
     """
 
     if format_type == "plain_text":
-        return " ".join([segment.text.lstrip() for segment in segments])
+        return " ".join(map(_LSTRIP, map(_SEG_TEXT, segments)))
     elif format_type == "formatted_text":
-        return "\n".join([segment.text.lstrip() for segment in segments])
+        return "\n".join(map(_LSTRIP, map(_SEG_TEXT, segments)))
     elif format_type == "srt":
         return write_srt(segments)
     elif format_type == "vtt":  # Added VTT case
         return write_vtt(segments)
     else:  # Default or unknown format
         print(f"Warning: Unknown format '{format_type}', defaulting to plain text.")
-        return " ".join([segment.text.lstrip() for segment in segments])
+        return " ".join(map(_LSTRIP, map(_SEG_TEXT, segments)))
 
 
 def write_vtt(transcript):
     """
     Write the transcript in VTT format.
     """
-    result = ""
+    parts = []
 
     for segment in transcript:
         # Using the consistent timestamp format from previous PR
-        result += f"{format_timestamp(segment.start, always_include_hours=True)} --> {format_timestamp(segment.end, always_include_hours=True)}\n"
-        result += f"{segment.text.strip().replace('-->', '->')}\n"
-        result += "\n"
+        start = format_timestamp(segment.start, always_include_hours=True)
+        end = format_timestamp(segment.end, always_include_hours=True)
+        text = segment.text.strip()
+        if "-->" in text:
+            text = text.replace("-->", "->")
+        parts.append(f"{start} --> {end}\n{text}\n\n")
 
-    return result
+    return "".join(parts)
 
 
 def write_srt(transcript):
     """
     Write the transcript in SRT format.
     """
-    result = ""
+    parts = []
 
     for i, segment in enumerate(transcript, start=1):
-        result += f"{i}\n"
-        result += f"{format_timestamp(segment.start, always_include_hours=True, decimal_marker=',')} --> "
-        result += f"{format_timestamp(segment.end, always_include_hours=True, decimal_marker=',')}\n"
-        result += f"{segment.text.strip().replace('-->', '->')}\n"
-        result += "\n"
-
-    return result
+        start = format_timestamp(segment.start, always_include_hours=True, decimal_marker=",")
+        end = format_timestamp(segment.end, always_include_hours=True, decimal_marker=",")
+        text = segment.text.strip()
+        if "-->" in text:
+            text = text.replace("-->", "->")
+        parts.append(f"{i}\n{start} --> {end}\n{text}\n\n")
+
+    return "".join(parts)